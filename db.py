@@ -4,6 +4,8 @@ Supports both local development (file fallback) and production (Redis).
 """
 import json
 import os
+import threading
+import time
 from datetime import datetime
 from typing import Optional, Dict, Any
 
@@ -40,11 +42,19 @@ def _get_redis() -> Optional['redis.Redis']:
     return _redis_client
 
 
+# Tokens are refreshed this many seconds before they actually expire
+TOKEN_REFRESH_SKEW = 300
+
+
 # File-based fallback for local development
 DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
 TOKENS_FILE = os.path.join(DATA_DIR, "tokens.json")
 USER_SETTINGS_FILE = os.path.join(DATA_DIR, "user_settings.json")
 
+# Store calls may run in worker threads (asyncio.to_thread); this serialises
+# every read and read-modify-write of the JSON files within the process.
+_file_lock = threading.Lock()
+
 
 def _ensure_data_dir():
     """Ensure the data directory exists."""
@@ -61,10 +71,12 @@ def _load_json(filepath: str) -> Dict[str, Any]:
 
 
 def _save_json(filepath: str, data: Dict[str, Any]):
-    """Save data to JSON file."""
+    """Save data to JSON file (atomically, so readers never see a partial file)."""
     _ensure_data_dir()
-    with open(filepath, "w") as f:
+    tmp_path = f"{filepath}.tmp"
+    with open(tmp_path, "w") as f:
         json.dump(data, f, indent=2)
+    os.replace(tmp_path, filepath)
 
 
 # ============================================
@@ -90,9 +102,10 @@ def store_spotify_tokens(uid: str, access_token: str, refresh_token: str, expire
         r.expire(key, 60 * 60 * 24 * 90)
     else:
         # Fallback to file
-        tokens = _load_json(TOKENS_FILE)
-        tokens[uid] = token_data
-        _save_json(TOKENS_FILE, tokens)
+        with _file_lock:
+            tokens = _load_json(TOKENS_FILE)
+            tokens[uid] = token_data
+            _save_json(TOKENS_FILE, tokens)
 
 
 def get_spotify_tokens(uid: str) -> Optional[Dict[str, Any]]:
@@ -106,7 +119,8 @@ def get_spotify_tokens(uid: str) -> Optional[Dict[str, Any]]:
             return json.loads(data)
         return None
     else:
-        tokens = _load_json(TOKENS_FILE)
+        with _file_lock:
+            tokens = _load_json(TOKENS_FILE)
         return tokens.get(uid)
 
 
@@ -118,20 +132,17 @@ def delete_spotify_tokens(uid: str):
         key = f"spotify:tokens:{uid}"
         r.delete(key)
     else:
-        tokens = _load_json(TOKENS_FILE)
-        if uid in tokens:
-            del tokens[uid]
-            _save_json(TOKENS_FILE, tokens)
+        with _file_lock:
+            tokens = _load_json(TOKENS_FILE)
+            if uid in tokens:
+                del tokens[uid]
+                _save_json(TOKENS_FILE, tokens)
 
 
-def is_token_expired(uid: str) -> bool:
-    """Check if the user's token is expired."""
-    tokens = get_spotify_tokens(uid)
-    if not tokens:
-        return True
+def needs_refresh(tokens: Dict[str, Any], skew: int = TOKEN_REFRESH_SKEW) -> bool:
+    """Check if a token has expired or will expire within `skew` seconds."""
     expires_at = tokens.get("expires_at", 0)
-    # Add 60 seconds buffer
-    return datetime.utcnow().timestamp() > (expires_at - 60)
+    return time.time() > (expires_at - skew)
 
 
 # ============================================
@@ -149,11 +160,12 @@ def store_user_setting(uid: str, key: str, value: Any):
         settings[key] = value
         r.set(redis_key, json.dumps(settings))
     else:
-        settings = _load_json(USER_SETTINGS_FILE)
-        if uid not in settings:
-            settings[uid] = {}
-        settings[uid][key] = value
-        _save_json(USER_SETTINGS_FILE, settings)
+        with _file_lock:
+            settings = _load_json(USER_SETTINGS_FILE)
+            if uid not in settings:
+                settings[uid] = {}
+            settings[uid][key] = value
+            _save_json(USER_SETTINGS_FILE, settings)
 
 
 def get_user_setting(uid: str, key: str) -> Optional[Any]:
@@ -167,7 +179,8 @@ def get_user_setting(uid: str, key: str) -> Optional[Any]:
             return json.loads(settings).get(key)
         return None
     else:
-        settings = _load_json(USER_SETTINGS_FILE)
+        with _file_lock:
+            settings = _load_json(USER_SETTINGS_FILE)
         return settings.get(uid, {}).get(key)
 
 
@@ -180,7 +193,8 @@ def get_user_settings(uid: str) -> Dict[str, Any]:
         settings = r.get(redis_key)
         return json.loads(settings) if settings else {}
     else:
-        settings = _load_json(USER_SETTINGS_FILE)
+        with _file_lock:
+            settings = _load_json(USER_SETTINGS_FILE)
         return settings.get(uid, {})
 
 
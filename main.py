@@ -3,41 +3,70 @@ Spotify Integration App for Omi
 
 This app provides Spotify integration through OAuth authentication
 and chat tools for searching songs, managing playlists, and controlling playback.
+
+Tokens and settings live in the shared store (see db.py). Everything else kept
+in memory here (profile/playlist caches, refresh locks, the rate limiter, pending
+playlist adds, the token sweeper) is per process, so with UVICORN_WORKERS > 1
+each worker keeps its own copy.
 """
 import os
+import sys
+import asyncio
 import base64
+import functools
+import gzip
+import hashlib
+import random
+import time
 import urllib.parse
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Final, List, Set, Tuple, Type
 
-import requests
+import httpx
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Request, Query
-from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from fastapi import FastAPI, HTTPException, Request, Query, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic import ValidationError
 
 from db import (
     store_spotify_tokens,
     get_spotify_tokens,
     delete_spotify_tokens,
-    is_token_expired,
+    needs_refresh,
     store_default_playlist,
     get_default_playlist,
     get_user_settings,
 )
 from models import (
+    ChatToolRequest,
     ChatToolResponse,
     SearchSongsRequest,
     AddToPlaylistRequest,
     CreatePlaylistRequest,
     GetPlaylistsRequest,
-    PlaySongRequest,
-    ControlPlaybackRequest,
     GetNowPlayingRequest,
+    ControlPlaybackRequest,
+    PlaySongRequest,
+    PlayPlaylistRequest,
     GetRecommendationsRequest,
-    SpotifyTrack,
-    SpotifyPlaylist,
+    validate_tool_request,
+    TOOL_NAMES,
+    ERR_UID_REQUIRED,
+    ERR_NOT_CONNECTED,
+    ERR_QUERY_REQUIRED,
+    ERR_SONG_NAME_REQUIRED,
+    ERR_PLAYLIST_NAME_REQUIRED,
+    ERR_PLAYLIST_REQUIRED,
+    ERR_NO_DEFAULT_PLAYLIST,
+    ERR_PROFILE_FAILED,
+    ERR_INVALID_ACTION,
+    ERR_NO_ACTIVE_DEVICE,
+    TrackInfo,
+    PlaylistInfo,
 )
 
 load_dotenv()
@@ -52,6 +81,15 @@ SPOTIFY_AUTH_URL = "https://accounts.spotify.com/authorize"
 SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
 SPOTIFY_API_BASE = "https://api.spotify.com/v1"
 
+# Client credentials for the accounts (token) endpoint, encoded once
+SPOTIFY_BASIC_AUTH: Final[str] = "Basic " + base64.b64encode(
+    f"{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}".encode()
+).decode()
+SPOTIFY_AUTH_HEADERS: Final[Dict[str, str]] = {
+    "Authorization": SPOTIFY_BASIC_AUTH,
+    "Content-Type": "application/x-www-form-urlencoded",
+}
+
 # Required Spotify scopes
 SPOTIFY_SCOPES = [
     "user-read-private",
@@ -67,41 +105,209 @@ SPOTIFY_SCOPES = [
     "user-read-currently-playing",
     "user-read-recently-played",
 ]
+SPOTIFY_SCOPES_STR: Final[str] = " ".join(SPOTIFY_SCOPES)
+
+# Query string for the authorize URL minus the per-user `state`
+SPOTIFY_AUTH_QUERY: Final[str] = urllib.parse.urlencode({
+    "client_id": SPOTIFY_CLIENT_ID,
+    "response_type": "code",
+    "redirect_uri": SPOTIFY_REDIRECT_URI,
+    "scope": SPOTIFY_SCOPES_STR,
+    "show_dialog": "true",
+})
+
+# Playback control actions -> Spotify endpoint/method and confirmation message
+_PLAYBACK_ENDPOINTS: Final[Dict[str, Tuple[str, str]]] = {
+    "play": ("/me/player/play", "PUT"),
+    "pause": ("/me/player/pause", "PUT"),
+    "next": ("/me/player/next", "POST"),
+    "skip": ("/me/player/next", "POST"),
+    "previous": ("/me/player/previous", "POST"),
+}
+_PLAYBACK_MESSAGES: Final[Dict[str, str]] = {
+    "play": "▶️ Resumed playback",
+    "pause": "⏸️ Paused playback",
+    "next": "⏭️ Skipped to next track",
+    "skip": "⏭️ Skipped to next track",
+    "previous": "⏮️ Went to previous track",
+}
+
+# Spotify caps /me/playlists pages at 50 items; extra pages are fetched
+# concurrently, at most PLAYLIST_PAGE_CONCURRENCY at a time per user.
+SPOTIFY_PLAYLIST_PAGE_SIZE = 50
+PLAYLIST_PAGE_CONCURRENCY = 8
+
+# Outbound Spotify API rate limiting and 429 retry policy
+SPOTIFY_RATE_LIMIT = int(os.getenv("SPOTIFY_RATE_LIMIT", "10"))  # requests per second
+SPOTIFY_MAX_RETRIES = 4
+SPOTIFY_MAX_BACKOFF = 8  # seconds
+
+# The Spotify user behind a connection doesn't change, so /me is cached
+# for as long as the access token it was fetched with is in use
+PROFILE_CACHE_TTL = 60 * 60  # seconds
+PROFILE_CACHE_SIZE = 1024
+
+# Playlist lookups by name/ID reuse one listing for the length of a chat turn
+PLAYLIST_CACHE_TTL = 60  # seconds
+PLAYLIST_CACHE_SIZE = 256
+
+# How often the background sweeper refreshes tokens that are close to expiry;
+# only users this process served within ACTIVE_USER_TTL are swept
+TOKEN_SWEEP_INTERVAL = 60  # seconds
+ACTIVE_USER_TTL = 60 * 60  # seconds
+ACTIVE_USER_CACHE_SIZE = 1024
+
+# Adds to the same playlist within this window are sent as one request
+ADD_TRACKS_COALESCE_WINDOW = 0.3  # seconds
+SPOTIFY_MAX_TRACKS_PER_ADD = 100
+
+# Max number of per-user token refresh locks kept around
+REFRESH_LOCK_CACHE_SIZE = 1024
+
+# Responses at least this large are gzipped
+GZIP_MINIMUM_SIZE = 1024
+GZIP_COMPRESS_LEVEL = 6
 
 app = FastAPI(
     title="Spotify Omi Integration",
     description="Spotify integration for Omi - Search songs, manage playlists, control playback",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
 
 # Mount static files and templates
 templates_dir = os.path.join(os.path.dirname(__file__), "templates")
 if os.path.exists(templates_dir):
     app.mount("/static", StaticFiles(directory=os.path.join(templates_dir, "static")), name="static")
 templates = Jinja2Templates(directory=templates_dir)
+# Compile the settings page at import rather than on the first request
+templates.get_template("setup.html")
+
+class LeakyBucket:
+    """
+    Async leaky-bucket rate limiter.
+    Up to `rate_per_sec` requests may start at once; after that a permit
+    leaks back every 1/rate_per_sec seconds. The leak task only runs while
+    permits are out. Create it inside the event loop that will use it.
+    """
+
+    def __init__(self, rate_per_sec: int):
+        self._rate = rate_per_sec
+        self._sem = asyncio.Semaphore(rate_per_sec)
+        self._taken = 0
+        self._leak_task: Optional[asyncio.Task] = None
+
+    async def _leak(self):
+        while self._taken:
+            await asyncio.sleep(1 / self._rate)
+            self._taken -= 1
+            self._sem.release()
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+        self._taken += 1
+        if self._leak_task is None or self._leak_task.done():
+            self._leak_task = asyncio.create_task(self._leak())
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Permits are returned by the leak task, not when the request ends
+        return False
+
+    def close(self):
+        """Stop the background leak task."""
+        if self._leak_task is not None:
+            self._leak_task.cancel()
+            self._leak_task = None
+
+
+# Shared HTTP client and rate limiter (created on startup, inside the serving
+# event loop) so Spotify calls reuse pooled keep-alive / HTTP/2 connections
+# instead of blocking the event loop.
+http_client: Optional[httpx.AsyncClient] = None
+spotify_rate_limiter: Optional[LeakyBucket] = None
+token_sweeper_task: Optional[asyncio.Task] = None
+
+
+@app.on_event("startup")
+async def startup():
+    """Create the shared HTTP client and rate limiter and start the token sweeper."""
+    global http_client, spotify_rate_limiter, token_sweeper_task
+    http_client = httpx.AsyncClient(
+        http2=True,
+        timeout=10,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        headers={"User-Agent": "omi-spotify/1.0"},
+    )
+    spotify_rate_limiter = LeakyBucket(SPOTIFY_RATE_LIMIT)
+    token_sweeper_task = asyncio.create_task(refresh_expiring_tokens())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background tasks and close the shared HTTP client."""
+    if token_sweeper_task is not None:
+        token_sweeper_task.cancel()
+    if spotify_rate_limiter is not None:
+        spotify_rate_limiter.close()
+    if http_client is not None:
+        await http_client.aclose()
 
 
 # ============================================
 # Helper Functions
 # ============================================
 
+def tool_response(result: Optional[str] = None, error: Optional[str] = None) -> Response:
+    """Build a chat tool response (ChatToolResponse shape) serialised with orjson."""
+    return Response(orjson.dumps({"result": result, "error": error}), media_type="application/json")
+
+
+def tool_error(body: bytes) -> Response:
+    """Send a pre-serialised chat tool error body from models."""
+    return Response(body, media_type="application/json")
+
+
+# Friendly errors for required chat tool fields that are missing
+_MISSING_FIELD_ERRORS: Final[Dict[str, bytes]] = {
+    "uid": ERR_UID_REQUIRED,
+    "query": ERR_QUERY_REQUIRED,
+    "song_name": ERR_SONG_NAME_REQUIRED,
+    "name": ERR_PLAYLIST_NAME_REQUIRED,
+    "action": ERR_INVALID_ACTION,
+}
+
+
+def validation_error_response(exc: ValidationError) -> Response:
+    """Turn the first error of a chat tool request validation into a tool response."""
+    error = exc.errors()[0]
+    loc = error["loc"]
+    if loc and loc[0] in TOOL_NAMES:
+        # Drop the union tag that discriminated-union errors are prefixed with
+        loc = loc[1:]
+    field = ".".join(str(part) for part in loc)
+    if error["type"] == "missing" and field in _MISSING_FIELD_ERRORS:
+        return tool_error(_MISSING_FIELD_ERRORS[field])
+    return tool_response(error=f"Invalid request: {field} - {error['msg']}" if field else f"Invalid request: {error['msg']}")
+
+
+def format_duration(ms: int) -> str:
+    """Format a duration in milliseconds as m:ss."""
+    minutes, seconds = divmod(ms // 1000, 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+@functools.lru_cache(maxsize=1024)
 def get_auth_header(access_token: str) -> Dict[str, str]:
-    """Get authorization header for Spotify API requests."""
+    """Get authorization header for Spotify API requests (shared; don't mutate)."""
     return {"Authorization": f"Bearer {access_token}"}
 
 
-def refresh_access_token(refresh_token: str) -> Optional[Dict[str, Any]]:
+async def refresh_access_token(refresh_token: str) -> Optional[Dict[str, Any]]:
     """Refresh the Spotify access token."""
-    auth_header = base64.b64encode(
-        f"{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}".encode()
-    ).decode()
-    
-    response = requests.post(
+    response = await http_client.post(
         SPOTIFY_TOKEN_URL,
-        headers={
-            "Authorization": f"Basic {auth_header}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        },
+        headers=SPOTIFY_AUTH_HEADERS,
         data={
             "grant_type": "refresh_token",
             "refresh_token": refresh_token,
@@ -109,22 +315,71 @@ def refresh_access_token(refresh_token: str) -> Optional[Dict[str, Any]]:
     )
     
     if response.status_code == 200:
-        return response.json()
+        return orjson.loads(response.content)
     return None
 
 
-def get_valid_access_token(uid: str) -> Optional[str]:
+# uid -> lock serialising token refreshes, bounded as an LRU
+_refresh_locks: "OrderedDict[str, asyncio.Lock]" = OrderedDict()
+
+
+def _get_refresh_lock(uid: str) -> asyncio.Lock:
+    """Get the per-user token refresh lock."""
+    lock = _refresh_locks.get(uid)
+    if lock is not None:
+        _refresh_locks.move_to_end(uid)
+        return lock
+    
+    lock = _refresh_locks[uid] = asyncio.Lock()
+    if len(_refresh_locks) > REFRESH_LOCK_CACHE_SIZE:
+        oldest_uid, oldest_lock = next(iter(_refresh_locks.items()))
+        if not oldest_lock.locked():
+            del _refresh_locks[oldest_uid]
+    return lock
+
+
+# uid -> monotonic time this process last served the user, bounded as an LRU
+_active_users: "OrderedDict[str, float]" = OrderedDict()
+
+
+def _mark_user_active(uid: str):
+    """Record that this process served the user, for the token sweeper."""
+    _active_users[uid] = time.monotonic()
+    _active_users.move_to_end(uid)
+    if len(_active_users) > ACTIVE_USER_CACHE_SIZE:
+        _active_users.popitem(last=False)
+
+
+async def get_valid_access_token(uid: str) -> Optional[str]:
     """Get a valid access token, refreshing if necessary."""
-    tokens = get_spotify_tokens(uid)
+    _mark_user_active(uid)
+    return await _load_access_token(uid)
+
+
+async def _load_access_token(uid: str) -> Optional[str]:
+    """Read the user's access token from the store, refreshing it if it's close to expiry."""
+    tokens = await asyncio.to_thread(get_spotify_tokens, uid)
     if not tokens:
         return None
     
-    if is_token_expired(uid):
-        # Refresh the token
-        new_tokens = refresh_access_token(tokens["refresh_token"])
+    if not needs_refresh(tokens):
+        return tokens["access_token"]
+    
+    # Only one refresh per user at a time; Spotify may rotate the refresh token
+    async with _get_refresh_lock(uid):
+        # Another request (or worker) may have refreshed while we waited for the lock
+        tokens = await asyncio.to_thread(get_spotify_tokens, uid)
+        if not tokens:
+            return None
+        if not needs_refresh(tokens):
+            return tokens["access_token"]
+        
+        # Refresh the token (ahead of expiry, see TOKEN_REFRESH_SKEW)
+        new_tokens = await refresh_access_token(tokens["refresh_token"])
         if new_tokens:
-            expires_at = int(datetime.utcnow().timestamp()) + new_tokens.get("expires_in", 3600)
-            store_spotify_tokens(
+            expires_at = int(time.time()) + new_tokens.get("expires_in", 3600)
+            await asyncio.to_thread(
+                store_spotify_tokens,
                 uid,
                 new_tokens["access_token"],
                 new_tokens.get("refresh_token", tokens["refresh_token"]),
@@ -132,52 +387,141 @@ def get_valid_access_token(uid: str) -> Optional[str]:
             )
             return new_tokens["access_token"]
         return None
-    
-    return tokens["access_token"]
 
 
-def spotify_api_request(
-    uid: str,
+async def refresh_expiring_tokens():
+    """
+    Background task: refresh tokens of recently active users before they expire.
+    Dormant users are left alone so their stored tokens can still age out.
+    """
+    while True:
+        # Jittered so workers started together don't sweep in lockstep
+        await asyncio.sleep(TOKEN_SWEEP_INTERVAL * random.uniform(0.75, 1.25))
+        cutoff = time.monotonic() - ACTIVE_USER_TTL
+        while _active_users and next(iter(_active_users.values())) < cutoff:
+            _active_users.popitem(last=False)
+        
+        for uid in list(_active_users):
+            try:
+                await _load_access_token(uid)
+            except Exception as e:
+                print(f"⚠️ Token refresh failed for {uid}: {e}")
+
+
+def _extract_error_message(data: Any, status: int) -> str:
+    """Get the error message from a Spotify API error body."""
+    if isinstance(data, dict):
+        error = data.get("error")
+        if isinstance(error, dict) and error.get("message"):
+            return error["message"]
+    return f"API error: {status}"
+
+
+async def spotify_api_request(
+    access_token: str,
     method: str,
     endpoint: str,
     params: Optional[Dict] = None,
     json_data: Optional[Dict] = None
 ) -> Dict[str, Any]:
-    """Make an authenticated request to Spotify API."""
-    access_token = get_valid_access_token(uid)
-    if not access_token:
-        return {"error": "User not authenticated with Spotify"}
-    
+    """Make a request to Spotify API with an already-resolved access token."""
     url = f"{SPOTIFY_API_BASE}{endpoint}"
     headers = get_auth_header(access_token)
     
+    method = method.upper()
+    if method not in ("GET", "POST", "PUT", "DELETE"):
+        return {"error": f"Unsupported HTTP method: {method}"}
+    
     try:
-        if method.upper() == "GET":
-            response = requests.get(url, headers=headers, params=params)
-        elif method.upper() == "POST":
-            response = requests.post(url, headers=headers, json=json_data, params=params)
-        elif method.upper() == "PUT":
-            response = requests.put(url, headers=headers, json=json_data, params=params)
-        elif method.upper() == "DELETE":
-            response = requests.delete(url, headers=headers, params=params)
-        else:
-            return {"error": f"Unsupported HTTP method: {method}"}
-        
-        if response.status_code == 204:
+        for attempt in range(SPOTIFY_MAX_RETRIES + 1):
+            async with spotify_rate_limiter:
+                response = await http_client.request(method, url, headers=headers, params=params, json=json_data)
+            
+            if response.status_code != 429 or attempt == SPOTIFY_MAX_RETRIES:
+                break
+            
+            # Rate limited: honour Retry-After, otherwise back off 1, 2, 4, 8s
+            retry_after = response.headers.get("Retry-After", "")
+            delay = int(retry_after) if retry_after.isdigit() else min(2 ** attempt, SPOTIFY_MAX_BACKOFF)
+            if delay > SPOTIFY_MAX_BACKOFF:
+                # Don't hold a chat request open for a long Spotify cooldown
+                break
+            await asyncio.sleep(delay)
+        
+        status = response.status_code
+        if status == 204:
             return {"success": True}
-        elif response.status_code >= 400:
-            error_data = response.json() if response.content else {}
-            return {"error": error_data.get("error", {}).get("message", f"API error: {response.status_code}")}
         
-        return response.json() if response.content else {"success": True}
-    except requests.RequestException as e:
+        try:
+            data = orjson.loads(response.content)
+        except orjson.JSONDecodeError:
+            data = None
+        
+        if status >= 400:
+            return {"error": _extract_error_message(data, status)}
+        return data or {"success": True}
+    except httpx.HTTPError as e:
         return {"error": f"Request failed: {str(e)}"}
 
 
-def search_tracks(uid: str, query: str, limit: int = 5) -> List[SpotifyTrack]:
+def _cache_put(cache: "OrderedDict[str, Any]", key: str, value: Any, max_size: int):
+    """Store a value in an LRU-bounded cache, evicting the oldest entries."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_size:
+        cache.popitem(last=False)
+
+
+# uid -> (access token, Spotify /me profile, monotonic time it was fetched), bounded as an LRU.
+# Keyed to the access token so a reconnect in another worker can't serve a stale profile.
+_profile_cache: "OrderedDict[str, Tuple[str, Dict[str, Any], float]]" = OrderedDict()
+
+
+# (uid, access token) -> in-flight /me fetch, so concurrent misses share one request
+_profile_fetches: Dict[Tuple[str, str], asyncio.Task] = {}
+
+
+async def get_spotify_profile(uid: str, access_token: str) -> Dict[str, Any]:
+    """Get the user's Spotify profile, cached per uid and access token."""
+    cached = _profile_cache.get(uid)
+    if cached and cached[0] == access_token and time.monotonic() - cached[2] < PROFILE_CACHE_TTL:
+        _profile_cache.move_to_end(uid)
+        return cached[1]
+    
+    key = (uid, access_token)
+    task = _profile_fetches.get(key)
+    if task is None:
+        task = _profile_fetches[key] = asyncio.create_task(_fetch_spotify_profile(uid, access_token))
+        task.add_done_callback(lambda _: _profile_fetches.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _fetch_spotify_profile(uid: str, access_token: str) -> Dict[str, Any]:
+    """Fetch /me and cache it."""
+    profile = await spotify_api_request(access_token, "GET", "/me")
+    if "error" not in profile:
+        _cache_put(_profile_cache, uid, (access_token, profile, time.monotonic()), PROFILE_CACHE_SIZE)
+    else:
+        _profile_cache.pop(uid, None)
+    return profile
+
+
+async def get_spotify_user_id(uid: str, access_token: str) -> Optional[str]:
+    """Get the user's Spotify user ID."""
+    profile = await get_spotify_profile(uid, access_token)
+    return profile.get("id")
+
+
+def invalidate_user_cache(uid: str):
+    """Drop cached Spotify data for a user (e.g. after reconnecting)."""
+    _profile_cache.pop(uid, None)
+    _playlists_cache.pop(uid, None)
+
+
+async def search_tracks(access_token: str, query: str, limit: int = 5) -> List[TrackInfo]:
     """Search for tracks on Spotify."""
-    result = spotify_api_request(
-        uid, "GET", "/search",
+    result = await spotify_api_request(
+        access_token, "GET", "/search",
         params={"q": query, "type": "track", "limit": limit}
     )
     
@@ -186,38 +530,58 @@ def search_tracks(uid: str, query: str, limit: int = 5) -> List[SpotifyTrack]:
     
     tracks = []
     for item in result.get("tracks", {}).get("items", []):
-        tracks.append(SpotifyTrack(
+        tracks.append(TrackInfo(
             id=item["id"],
             name=item["name"],
-            artists=[a["name"] for a in item["artists"]],
+            artists=tuple(sys.intern(a["name"]) for a in item["artists"]),
             album=item["album"]["name"],
             duration_ms=item["duration_ms"],
             uri=item["uri"],
-            external_url=item.get("external_urls", {}).get("spotify"),
             preview_url=item.get("preview_url")
         ))
     return tracks
 
 
-def get_user_playlists(uid: str, limit: int = 20, onlyModifiableByUser: bool = False) -> List[SpotifyPlaylist]:
-    """Get user's playlists."""
-    result = spotify_api_request(
-        uid, "GET", "/me/playlists",
-        params={"limit": limit}
+async def get_user_playlists(uid: str, access_token: str, limit: Optional[int] = 20, onlyModifiableByUser: bool = False) -> List[PlaylistInfo]:
+    """Get user's playlists (all of them if limit is None)."""
+    page_size = SPOTIFY_PLAYLIST_PAGE_SIZE if limit is None else min(limit, SPOTIFY_PLAYLIST_PAGE_SIZE)
+    result, user_profile = await asyncio.gather(
+        spotify_api_request(access_token, "GET", "/me/playlists", params={"limit": page_size, "offset": 0}),
+        get_spotify_profile(uid, access_token),
     )
     
     if "error" in result:
         return []
-
-    user_profile = spotify_api_request(uid, "GET", "/me")
+    
+    items = result.get("items", [])
+    total = result.get("total", len(items))
+    wanted = total if limit is None else min(limit, total)
+    
+    # Fetch the remaining pages concurrently once the total is known
+    offsets = range(page_size, wanted, SPOTIFY_PLAYLIST_PAGE_SIZE)
+    if offsets:
+        semaphore = asyncio.Semaphore(PLAYLIST_PAGE_CONCURRENCY)
+        
+        async def fetch_page(offset: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await spotify_api_request(
+                    access_token, "GET", "/me/playlists",
+                    params={"limit": min(SPOTIFY_PLAYLIST_PAGE_SIZE, wanted - offset), "offset": offset}
+                )
+        
+        for page in await asyncio.gather(*(fetch_page(offset) for offset in offsets)):
+            if "error" in page:
+                # A partial listing would look complete (and get cached); fail instead
+                return []
+            items.extend(page.get("items", []))
     
     playlists = []
-    for item in result.get("items", []):
+    for item in items:
         canEdit = item["owner"]["id"] == user_profile["id"] or item["collaborative"] == True
         if onlyModifiableByUser and not canEdit:
             continue
 
-        playlists.append(SpotifyPlaylist(
+        playlists.append(PlaylistInfo(
             id=item["id"],
             name=item["name"],
             description=item.get("description", ""),
@@ -231,33 +595,109 @@ def get_user_playlists(uid: str, limit: int = 20, onlyModifiableByUser: bool = F
     return playlists
 
 
-def find_playlist_by_name(uid: str, name: str, onlyModifiableByUser: bool = False) -> Optional[SpotifyPlaylist]:
-    """Find a playlist by name (case-insensitive partial match)."""
-    playlists = get_user_playlists(uid, limit=50, onlyModifiableByUser=onlyModifiableByUser)
-    name_lower = name.lower()
+# uid -> (all of the user's playlists, monotonic time they were fetched), bounded as an LRU
+_playlists_cache: "OrderedDict[str, Tuple[List[PlaylistInfo], float]]" = OrderedDict()
+
+
+async def get_cached_user_playlists(uid: str, access_token: str) -> List[PlaylistInfo]:
+    """Get all of the user's playlists, cached per uid for PLAYLIST_CACHE_TTL."""
+    now = time.monotonic()
+    # Entries are kept oldest first, so expired ones are all at the front
+    while _playlists_cache and now - next(iter(_playlists_cache.values()))[1] >= PLAYLIST_CACHE_TTL:
+        _playlists_cache.popitem(last=False)
     
-    # First try exact match
-    for playlist in playlists:
-        if playlist.name.lower() == name_lower:
-            return playlist
+    cached = _playlists_cache.get(uid)
+    if cached:
+        return cached[0]
     
-    # Then try partial match
+    playlists = await get_user_playlists(uid, access_token, limit=None)
+    if playlists:
+        _cache_put(_playlists_cache, uid, (playlists, time.monotonic()), PLAYLIST_CACHE_SIZE)
+    return playlists
+
+
+async def find_playlist_by_name(uid: str, access_token: str, name: str, onlyModifiableByUser: bool = False) -> Optional[PlaylistInfo]:
+    """Find a playlist by name (exact match first, then case-insensitive partial match)."""
+    playlists = await get_cached_user_playlists(uid, access_token)
+    name_lower = name.lower()
+    
+    partial = None
     for playlist in playlists:
-        if name_lower in playlist.name.lower():
+        if onlyModifiableByUser and not playlist.canEdit:
+            continue
+        playlist_name = playlist.name.lower()
+        if playlist_name == name_lower:
             return playlist
+        if partial is None and name_lower in playlist_name:
+            partial = playlist
     
-    return None
+    return partial
 
 
-def find_playlist_by_id(uid: str, id: str, onlyModifiableByUser: bool = False) -> Optional[SpotifyPlaylist]:
+async def find_playlist_by_id(uid: str, access_token: str, id: str, onlyModifiableByUser: bool = False) -> Optional[PlaylistInfo]:
     """Find a playlist by ID."""
-    playlists = get_user_playlists(uid, limit=50, onlyModifiableByUser=onlyModifiableByUser)
+    playlists = await get_cached_user_playlists(uid, access_token)
     for playlist in playlists:
-        if playlist.id == id:
+        if playlist.id == id and (playlist.canEdit or not onlyModifiableByUser):
             return playlist
     return None
 
 
+# (uid, playlist_id) -> (track URIs waiting to be added, future for the per-chunk results)
+_pending_adds: Dict[Tuple[str, str], Tuple[List[str], asyncio.Future]] = {}
+_flush_tasks: Set[asyncio.Task] = set()
+
+
+async def add_track_to_playlist(uid: str, access_token: str, playlist_id: str, track_uri: str) -> Dict[str, Any]:
+    """
+    Add a track to a playlist.
+    Adds to the same playlist within ADD_TRACKS_COALESCE_WINDOW are batched
+    into as few Spotify requests as possible; each caller gets the result of
+    the request that carried its track.
+    """
+    key = (uid, playlist_id)
+    pending = _pending_adds.get(key)
+    if pending is None:
+        pending = _pending_adds[key] = ([], asyncio.get_running_loop().create_future())
+        task = asyncio.create_task(_flush_pending_adds(key, access_token))
+        _flush_tasks.add(task)
+        task.add_done_callback(_flush_tasks.discard)
+    
+    uris, future = pending
+    index = len(uris)
+    uris.append(track_uri)
+    results = await asyncio.shield(future)
+    return results[index // SPOTIFY_MAX_TRACKS_PER_ADD]
+
+
+async def _flush_pending_adds(key: Tuple[str, str], access_token: str):
+    """Send the batched adds for a playlist once the coalescing window closes."""
+    uris, future = _pending_adds[key]
+    _, playlist_id = key
+    
+    try:
+        await asyncio.sleep(ADD_TRACKS_COALESCE_WINDOW)
+        del _pending_adds[key]
+        
+        # One result per chunk of SPOTIFY_MAX_TRACKS_PER_ADD tracks
+        results = []
+        for start in range(0, len(uris), SPOTIFY_MAX_TRACKS_PER_ADD):
+            results.append(await spotify_api_request(
+                access_token, "POST",
+                f"/playlists/{playlist_id}/tracks",
+                json_data={"uris": uris[start:start + SPOTIFY_MAX_TRACKS_PER_ADD]}
+            ))
+        future.set_result(results)
+    except Exception as e:
+        future.set_exception(e)
+    finally:
+        # Cancelled (e.g. at shutdown): don't leave callers waiting on the batch
+        if _pending_adds.get(key, (None, None))[1] is future:
+            del _pending_adds[key]
+        if not future.done():
+            future.set_exception(RuntimeError("Adding to the playlist was interrupted"))
+
+
 # ============================================
 # OAuth Endpoints
 # ============================================
@@ -272,8 +712,8 @@ async def home(request: Request, uid: Optional[str] = None):
             "error": "Missing user ID"
         })
     
-    tokens = get_spotify_tokens(uid)
-    authenticated = tokens is not None
+    access_token = await get_valid_access_token(uid)
+    authenticated = access_token is not None
     
     # Get user profile if authenticated
     user_profile = None
@@ -281,12 +721,13 @@ async def home(request: Request, uid: Optional[str] = None):
     default_playlist = None
     
     if authenticated:
-        profile_result = spotify_api_request(uid, "GET", "/me")
+        profile_result, playlists, default_playlist = await asyncio.gather(
+            get_spotify_profile(uid, access_token),
+            get_user_playlists(uid, access_token, limit=None, onlyModifiableByUser=True),
+            asyncio.to_thread(get_default_playlist, uid),
+        )
         if "error" not in profile_result:
             user_profile = profile_result
-        
-        playlists = get_user_playlists(uid, limit=50, onlyModifiableByUser=True)
-        default_playlist = get_default_playlist(uid)
     
     return templates.TemplateResponse("setup.html", {
         "request": request,
@@ -305,16 +746,7 @@ async def spotify_auth(uid: str):
     if not uid:
         raise HTTPException(status_code=400, detail="User ID is required")
     
-    params = {
-        "client_id": SPOTIFY_CLIENT_ID,
-        "response_type": "code",
-        "redirect_uri": SPOTIFY_REDIRECT_URI,
-        "scope": " ".join(SPOTIFY_SCOPES),
-        "state": uid,
-        "show_dialog": "true"
-    }
-    
-    auth_url = f"{SPOTIFY_AUTH_URL}?{urllib.parse.urlencode(params)}"
+    auth_url = f"{SPOTIFY_AUTH_URL}?{SPOTIFY_AUTH_QUERY}&{urllib.parse.urlencode({'state': uid})}"
     return RedirectResponse(url=auth_url)
 
 
@@ -338,16 +770,9 @@ async def spotify_callback(request: Request, code: str = None, state: str = None
     uid = state
     
     # Exchange code for tokens
-    auth_header = base64.b64encode(
-        f"{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}".encode()
-    ).decode()
-    
-    response = requests.post(
+    response = await http_client.post(
         SPOTIFY_TOKEN_URL,
-        headers={
-            "Authorization": f"Basic {auth_header}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        },
+        headers=SPOTIFY_AUTH_HEADERS,
         data={
             "grant_type": "authorization_code",
             "code": code,
@@ -362,8 +787,8 @@ async def spotify_callback(request: Request, code: str = None, state: str = None
             "error": "Failed to exchange authorization code"
         })
     
-    token_data = response.json()
-    expires_at = int(datetime.utcnow().timestamp()) + token_data.get("expires_in", 3600)
+    token_data = orjson.loads(response.content)
+    expires_at = int(time.time()) + token_data.get("expires_in", 3600)
     
     store_spotify_tokens(
         uid,
@@ -371,6 +796,7 @@ async def spotify_callback(request: Request, code: str = None, state: str = None
         token_data["refresh_token"],
         expires_at
     )
+    invalidate_user_cache(uid)
     
     # Redirect to home with uid
     return RedirectResponse(url=f"/?uid={uid}")
@@ -394,6 +820,7 @@ async def set_default_playlist(uid: str, playlist_id: str, playlist_name: str):
 async def disconnect_spotify(uid: str):
     """Disconnect Spotify account."""
     delete_spotify_tokens(uid)
+    invalidate_user_cache(uid)
     return RedirectResponse(url=f"/?uid={uid}")
 
 
@@ -408,37 +835,39 @@ async def tool_search_songs(request: Request):
     Chat tool for Omi - searches Spotify and returns matching tracks.
     """
     try:
-        body = await request.json()
-        uid = body.get("uid")
-        query = body.get("query", "")
-        limit = body.get("limit", 5)
+        req = validate_tool_request("search_songs", orjson.loads(await request.body()))
+        uid = req.uid
+        query = req.query
+        limit = req.limit
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
         if not query:
-            return ChatToolResponse(error="Search query is required")
+            return tool_error(ERR_QUERY_REQUIRED)
         
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
         
-        tracks = search_tracks(uid, query, limit)
+        tracks = await search_tracks(access_token, query, limit)
         
         if not tracks:
-            return ChatToolResponse(result=f"No songs found for '{query}'")
+            return tool_response(result=f"No songs found for '{query}'")
         
         # Format results
-        results = []
-        for i, track in enumerate(tracks, 1):
-            artists = ", ".join(track.artists)
-            duration = f"{track.duration_ms // 60000}:{(track.duration_ms % 60000) // 1000:02d}"
-            results.append(f"{i}. **{track.name}** by {artists} ({duration}) - Album: {track.album}")
+        results = "\n".join(
+            f"{i}. **{track.name}** by {', '.join(track.artists)} ({format_duration(track.duration_ms)}) - Album: {track.album}"
+            for i, track in enumerate(tracks, 1)
+        )
         
-        return ChatToolResponse(result=f"🎵 Found {len(tracks)} songs:\n\n" + "\n".join(results))
+        return tool_response(result=f"🎵 Found {len(tracks)} songs:\n\n" + results)
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Search failed: {str(e)}")
+        return tool_response(error=f"Search failed: {str(e)}")
 
 
 @app.post("/tools/add_to_playlist", tags=["chat_tools"], response_model=ChatToolResponse)
@@ -448,90 +877,87 @@ async def tool_add_to_playlist(request: Request):
     Chat tool for Omi - searches for the song and adds it to the specified playlist.
     """
     try:
-        body = await request.json()
-        print(f"🎵 ADD TO PLAYLIST - Received request: {body}")
-        uid = body.get("uid")
-        song_name = body.get("song_name", "")
-        artist_name = body.get("artist_name", "")
-        playlist_name = body.get("playlist_name")
-        playlist_id = body.get("playlist_id")
+        req = validate_tool_request("add_to_playlist", orjson.loads(await request.body()))
+        print(f"🎵 ADD TO PLAYLIST - Received request: {req}")
+        uid = req.uid
+        song_name = req.song_name
+        artist_name = req.artist_name
+        playlist_name = req.playlist_name
+        playlist_id = req.playlist_id
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
         if not song_name:
-            return ChatToolResponse(error="Song name is required")
+            return tool_error(ERR_SONG_NAME_REQUIRED)
         
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
         
         # Build search query
         search_query = song_name
         if artist_name:
             search_query = f"{song_name} artist:{artist_name}"
         
-        # Search for the song
-        tracks = search_tracks(uid, search_query, limit=1)
+        # Search for the song, looking up a named playlist concurrently
+        target_playlist = None
+        if playlist_name and not playlist_id:
+            tracks, target_playlist = await asyncio.gather(
+                search_tracks(access_token, search_query, limit=1),
+                find_playlist_by_name(uid, access_token, playlist_name, onlyModifiableByUser=True),
+            )
+        else:
+            tracks = await search_tracks(access_token, search_query, limit=1)
         
         if not tracks:
-            return ChatToolResponse(error=f"Could not find song: {song_name}")
+            return tool_response(error=f"Could not find song: {song_name}")
         
         track = tracks[0]
         
         # Determine which playlist to use
-        target_playlist = None
-        
         if playlist_id:
             # Use provided playlist ID
-            target_playlist = SpotifyPlaylist(
+            target_playlist = PlaylistInfo(
                 id=playlist_id,
                 name=playlist_name or "Unknown",
-                owner="",
-                tracks_total=0,
-                public=False,
                 uri=f"spotify:playlist:{playlist_id}"
             )
         elif playlist_name:
-            # Find playlist by name
-            target_playlist = find_playlist_by_name(uid, playlist_name, onlyModifiableByUser=True)
+            # Playlist was looked up by name above
             if not target_playlist:
-                return ChatToolResponse(error=f"Could not find playlist (editable by you): {playlist_name}")
+                return tool_response(error=f"Could not find playlist (editable by you): {playlist_name}")
         else:
             # Use default playlist
             default = get_default_playlist(uid)
             if default:
-                target_playlist = SpotifyPlaylist(
+                target_playlist = PlaylistInfo(
                     id=default["id"],
                     name=default["name"],
-                    owner="",
-                    tracks_total=0,
-                    public=False,
                     uri=f"spotify:playlist:{default['id']}"
                 )
             else:
-                return ChatToolResponse(error="No playlist specified and no default playlist set. Please specify a playlist name or set a default in app settings.")
+                return tool_error(ERR_NO_DEFAULT_PLAYLIST)
         
         # Add track to playlist
         print(f"🎵 Adding track {track.uri} to playlist {target_playlist.id} ({target_playlist.name})")
-        result = spotify_api_request(
-            uid, "POST",
-            f"/playlists/{target_playlist.id}/tracks",
-            json_data={"uris": [track.uri]}
-        )
+        result = await add_track_to_playlist(uid, access_token, target_playlist.id, track.uri)
         print(f"🎵 Spotify API response: {result}")
         
         if "error" in result:
-            return ChatToolResponse(error=f"Failed to add song: {result['error']}")
+            return tool_response(error=f"Failed to add song: {result['error']}")
         
         artists = ", ".join(track.artists)
         print(f"🎵 SUCCESS: Added {track.name} by {artists} to {target_playlist.name}")
-        return ChatToolResponse(
+        return tool_response(
             result=f"✅ Added **{track.name}** by {artists} to playlist **{target_playlist.name}**!"
         )
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Failed to add song: {str(e)}")
+        return tool_response(error=f"Failed to add song: {str(e)}")
 
 
 @app.post("/tools/create_playlist", tags=["chat_tools"], response_model=ChatToolResponse)
@@ -541,32 +967,31 @@ async def tool_create_playlist(request: Request):
     Chat tool for Omi - creates a new playlist with the specified name.
     """
     try:
-        body = await request.json()
-        uid = body.get("uid")
-        name = body.get("name", "")
-        description = body.get("description", "Created with Omi")
-        public = body.get("public", False)
+        req = validate_tool_request("create_playlist", orjson.loads(await request.body()))
+        uid = req.uid
+        name = req.name
+        description = req.description
+        public = req.public
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
         if not name:
-            return ChatToolResponse(error="Playlist name is required")
+            return tool_error(ERR_PLAYLIST_NAME_REQUIRED)
         
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
         
         # Get user ID
-        profile = spotify_api_request(uid, "GET", "/me")
-        if "error" in profile:
-            return ChatToolResponse(error="Failed to get user profile")
-        
-        spotify_user_id = profile["id"]
+        spotify_user_id = await get_spotify_user_id(uid, access_token)
+        if not spotify_user_id:
+            return tool_error(ERR_PROFILE_FAILED)
         
         # Create playlist
-        result = spotify_api_request(
-            uid, "POST",
+        result = await spotify_api_request(
+            access_token, "POST",
             f"/users/{spotify_user_id}/playlists",
             json_data={
                 "name": name,
@@ -576,15 +1001,20 @@ async def tool_create_playlist(request: Request):
         )
         
         if "error" in result:
-            return ChatToolResponse(error=f"Failed to create playlist: {result['error']}")
+            return tool_response(error=f"Failed to create playlist: {result['error']}")
+        
+        # Make the new playlist visible to name lookups straight away
+        _playlists_cache.pop(uid, None)
         
         playlist_url = result.get("external_urls", {}).get("spotify", "")
-        return ChatToolResponse(
+        return tool_response(
             result=f"✅ Created playlist **{name}**!\n\nOpen in Spotify: {playlist_url}"
         )
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Failed to create playlist: {str(e)}")
+        return tool_response(error=f"Failed to create playlist: {str(e)}")
 
 
 @app.post("/tools/get_playlists", tags=["chat_tools"], response_model=ChatToolResponse)
@@ -594,23 +1024,24 @@ async def tool_get_playlists(request: Request):
     Chat tool for Omi - retrieves the user's playlists.
     """
     try:
-        body = await request.json()
-        uid = body.get("uid")
-        limit = body.get("limit", 10)
+        req = validate_tool_request("get_playlists", orjson.loads(await request.body()))
+        uid = req.uid
+        limit = req.limit
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
         
-        playlists = get_user_playlists(uid, limit)
+        playlists = await get_user_playlists(uid, access_token, limit)
         
         if not playlists:
-            return ChatToolResponse(result="You don't have any playlists yet.")
+            return tool_response(result="You don't have any playlists yet.")
         
-        return ChatToolResponse(result=str([{
+        return tool_response(result=str([{
                 "id": playlist.id,
                 "name": playlist.name,
                 "description": playlist.description,
@@ -621,8 +1052,10 @@ async def tool_get_playlists(request: Request):
                 "external_url": playlist.external_url
             } for playlist in playlists]))
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Failed to get playlists: {str(e)}")
+        return tool_response(error=f"Failed to get playlists: {str(e)}")
 
 
 @app.post("/tools/get_now_playing", tags=["chat_tools"], response_model=ChatToolResponse)
@@ -632,44 +1065,45 @@ async def tool_get_now_playing(request: Request):
     Chat tool for Omi - shows what's currently playing.
     """
     try:
-        body = await request.json()
-        uid = body.get("uid")
+        req = validate_tool_request("get_now_playing", orjson.loads(await request.body()))
+        uid = req.uid
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
         
-        result = spotify_api_request(uid, "GET", "/me/player/currently-playing")
+        result = await spotify_api_request(access_token, "GET", "/me/player/currently-playing")
         
         if "error" in result:
-            return ChatToolResponse(error=f"Failed to get playback: {result['error']}")
+            return tool_response(error=f"Failed to get playback: {result['error']}")
         
         if not result or not result.get("item"):
-            return ChatToolResponse(result="🔇 Nothing is currently playing on Spotify.")
+            return tool_response(result="🔇 Nothing is currently playing on Spotify.")
         
         track = result["item"]
         is_playing = result.get("is_playing", False)
         progress_ms = result.get("progress_ms", 0)
         
-        artists = ", ".join([a["name"] for a in track["artists"]])
-        duration_ms = track["duration_ms"]
-        
-        progress = f"{progress_ms // 60000}:{(progress_ms % 60000) // 1000:02d}"
-        duration = f"{duration_ms // 60000}:{(duration_ms % 60000) // 1000:02d}"
+        artists = ", ".join(a["name"] for a in track["artists"])
+        progress = format_duration(progress_ms)
+        duration = format_duration(track["duration_ms"])
         
         status = "▶️ Playing" if is_playing else "⏸️ Paused"
         
-        return ChatToolResponse(
+        return tool_response(
             result=f"{status}: **{track['name']}** by {artists}\n"
                    f"Album: {track['album']['name']}\n"
                    f"Progress: {progress} / {duration}"
         )
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Failed to get current playback: {str(e)}")
+        return tool_response(error=f"Failed to get current playback: {str(e)}")
 
 
 @app.post("/tools/control_playback", tags=["chat_tools"], response_model=ChatToolResponse)
@@ -679,49 +1113,35 @@ async def tool_control_playback(request: Request):
     Chat tool for Omi - controls music playback.
     """
     try:
-        body = await request.json()
-        uid = body.get("uid")
-        action = body.get("action", "").lower()
+        req = validate_tool_request("control_playback", orjson.loads(await request.body()))
+        uid = req.uid
+        action = req.action.lower()
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
-        if action not in ["play", "pause", "next", "previous", "skip"]:
-            return ChatToolResponse(error="Invalid action. Use: play, pause, next, previous")
+        if action not in _PLAYBACK_ENDPOINTS:
+            return tool_error(ERR_INVALID_ACTION)
         
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
         
-        # Map action to endpoint
-        endpoint_map = {
-            "play": ("/me/player/play", "PUT"),
-            "pause": ("/me/player/pause", "PUT"),
-            "next": ("/me/player/next", "POST"),
-            "skip": ("/me/player/next", "POST"),
-            "previous": ("/me/player/previous", "POST"),
-        }
-        
-        endpoint, method = endpoint_map[action]
-        result = spotify_api_request(uid, method, endpoint)
+        endpoint, method = _PLAYBACK_ENDPOINTS[action]
+        result = await spotify_api_request(access_token, method, endpoint)
         
         if "error" in result:
             if "No active device" in str(result.get("error", "")):
-                return ChatToolResponse(error="No active Spotify device found. Please open Spotify on one of your devices first.")
-            return ChatToolResponse(error=f"Playback control failed: {result['error']}")
-        
-        action_messages = {
-            "play": "▶️ Resumed playback",
-            "pause": "⏸️ Paused playback",
-            "next": "⏭️ Skipped to next track",
-            "skip": "⏭️ Skipped to next track",
-            "previous": "⏮️ Went to previous track",
-        }
-        
-        return ChatToolResponse(result=action_messages[action])
+                return tool_error(ERR_NO_ACTIVE_DEVICE)
+            return tool_response(error=f"Playback control failed: {result['error']}")
+        
+        return tool_response(result=_PLAYBACK_MESSAGES[action])
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Playback control failed: {str(e)}")
+        return tool_response(error=f"Playback control failed: {str(e)}")
 
 
 @app.post("/tools/play_song", tags=["chat_tools"], response_model=ChatToolResponse)
@@ -731,20 +1151,21 @@ async def tool_play_song(request: Request):
     Chat tool for Omi - finds and plays a song.
     """
     try:
-        body = await request.json()
-        uid = body.get("uid")
-        song_name = body.get("song_name", "")
-        artist_name = body.get("artist_name", "")
+        req = validate_tool_request("play_song", orjson.loads(await request.body()))
+        uid = req.uid
+        song_name = req.song_name
+        artist_name = req.artist_name
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
         if not song_name:
-            return ChatToolResponse(error="Song name is required")
+            return tool_error(ERR_SONG_NAME_REQUIRED)
         
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
         
         # Build search query
         search_query = song_name
@@ -752,33 +1173,33 @@ async def tool_play_song(request: Request):
             search_query = f"{song_name} artist:{artist_name}"
         
         # Search for the song
-        tracks = search_tracks(uid, search_query, limit=1)
+        tracks = await search_tracks(access_token, search_query, limit=1)
         
         if not tracks:
-            return ChatToolResponse(error=f"Could not find song: {song_name}")
+            return tool_response(error=f"Could not find song: {song_name}")
         
         track = tracks[0]
         
         # Play the track
-        result = spotify_api_request(
-            uid, "PUT", "/me/player/play",
+        result = await spotify_api_request(
+            access_token, "PUT", "/me/player/play",
             json_data={"uris": [track.uri]}
         )
         
         if "error" in result:
             if "No active device" in str(result.get("error", "")):
-                return ChatToolResponse(
-                    error="No active Spotify device found. Please open Spotify on one of your devices first."
-                )
-            return ChatToolResponse(error=f"Failed to play: {result['error']}")
+                return tool_error(ERR_NO_ACTIVE_DEVICE)
+            return tool_response(error=f"Failed to play: {result['error']}")
         
         artists = ", ".join(track.artists)
-        return ChatToolResponse(
+        return tool_response(
             result=f"▶️ Now playing: **{track.name}** by {artists}"
         )
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Failed to play song: {str(e)}")
+        return tool_response(error=f"Failed to play song: {str(e)}")
 
 
 @app.post("/tools/play_playlist", tags=["chat_tools"], response_model=ChatToolResponse)
@@ -788,53 +1209,54 @@ async def tool_play_playlist(request: Request):
     Chat tool for Omi - finds and plays a playlist.
     """
     try:
-        body = await request.json()
-        uid = body.get("uid")
-        playlist_id = body.get("playlist_id")
-        playlist_name = body.get("playlist_name")
+        req = validate_tool_request("play_playlist", orjson.loads(await request.body()))
+        uid = req.uid
+        playlist_id = req.playlist_id
+        playlist_name = req.playlist_name
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
         if not playlist_id and not playlist_name:
-            return ChatToolResponse(error="Playlist ID or name is required")
+            return tool_error(ERR_PLAYLIST_REQUIRED)
 
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
 
         target_playlist = None
 
         if playlist_id:
             print(f"🎵 Playlist ID provided: {playlist_id}")
-            target_playlist = find_playlist_by_id(uid, playlist_id)
+            target_playlist = await find_playlist_by_id(uid, access_token, playlist_id)
             if not target_playlist:
-                return ChatToolResponse(error=f"Could not find playlist with ID: {playlist_id}")
+                return tool_response(error=f"Could not find playlist with ID: {playlist_id}")
         elif playlist_name:
             print(f"🎵 Playlist name provided: {playlist_name}")
-            target_playlist = find_playlist_by_name(uid, playlist_name)
+            target_playlist = await find_playlist_by_name(uid, access_token, playlist_name)
             if not target_playlist:
-                return ChatToolResponse(error=f"Could not find playlist with name: {playlist_name}")
+                return tool_response(error=f"Could not find playlist with name: {playlist_name}")
 
         # Play the playlist
-        result = spotify_api_request(
-            uid, "PUT", "/me/player/play",
+        result = await spotify_api_request(
+            access_token, "PUT", "/me/player/play",
             json_data={"context_uri": target_playlist.uri}
         )
         
         if "error" in result:
             if "No active device" in str(result.get("error", "")):
-                return ChatToolResponse(
-                    error="No active Spotify device found. Please open Spotify on one of your devices first."
-                )
-            return ChatToolResponse(error=f"Failed to play: {result['error']}")
+                return tool_error(ERR_NO_ACTIVE_DEVICE)
+            return tool_response(error=f"Failed to play: {result['error']}")
         
-        return ChatToolResponse(
+        return tool_response(
             result=f"▶️ Now playing: **{target_playlist.name}**"
         )
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Failed to play playlist: {str(e)}")
+        return tool_response(error=f"Failed to play playlist: {str(e)}")
 
 
 @app.post("/tools/get_recommendations", tags=["chat_tools"], response_model=ChatToolResponse)
@@ -844,23 +1266,24 @@ async def tool_get_recommendations(request: Request):
     Chat tool for Omi - gets personalized recommendations.
     """
     try:
-        body = await request.json()
-        uid = body.get("uid")
-        seed_tracks = body.get("seed_tracks", [])
-        seed_artists = body.get("seed_artists", [])
-        seed_genres = body.get("seed_genres", [])
-        limit = body.get("limit", 5)
+        req = validate_tool_request("get_recommendations", orjson.loads(await request.body()))
+        uid = req.uid
+        seed_tracks = req.seed_tracks or []
+        seed_artists = req.seed_artists or []
+        seed_genres = req.seed_genres or []
+        limit = req.limit
         
         if not uid:
-            return ChatToolResponse(error="User ID is required")
+            return tool_error(ERR_UID_REQUIRED)
         
         # Check authentication
-        if not get_spotify_tokens(uid):
-            return ChatToolResponse(error="Please connect your Spotify account first in the app settings.")
+        access_token = await get_valid_access_token(uid)
+        if not access_token:
+            return tool_error(ERR_NOT_CONNECTED)
         
         # If no seeds provided, get from recently played
         if not seed_tracks and not seed_artists and not seed_genres:
-            recent = spotify_api_request(uid, "GET", "/me/player/recently-played", params={"limit": 5})
+            recent = await spotify_api_request(access_token, "GET", "/me/player/recently-played", params={"limit": 5})
             if "error" not in recent and recent.get("items"):
                 seed_tracks = [item["track"]["id"] for item in recent["items"][:5]]
         
@@ -872,233 +1295,260 @@ async def tool_get_recommendations(request: Request):
         if seed_genres:
             params["seed_genres"] = ",".join(seed_genres[:5])
         
-        result = spotify_api_request(uid, "GET", "/recommendations", params=params)
+        result = await spotify_api_request(access_token, "GET", "/recommendations", params=params)
         
         if "error" in result:
-            return ChatToolResponse(error=f"Failed to get recommendations: {result['error']}")
+            return tool_response(error=f"Failed to get recommendations: {result['error']}")
         
         tracks = result.get("tracks", [])
         if not tracks:
-            return ChatToolResponse(result="No recommendations found.")
+            return tool_response(result="No recommendations found.")
         
         # Format results
-        results = []
-        for i, track in enumerate(tracks, 1):
-            artists = ", ".join([a["name"] for a in track["artists"]])
-            results.append(f"{i}. **{track['name']}** by {artists}")
+        results = "\n".join(
+            f"{i}. **{track['name']}** by {', '.join(a['name'] for a in track['artists'])}"
+            for i, track in enumerate(tracks, 1)
+        )
         
-        return ChatToolResponse(result=f"🎧 Recommended songs for you:\n\n" + "\n".join(results))
+        return tool_response(result=f"🎧 Recommended songs for you:\n\n" + results)
     
+    except ValidationError as e:
+        return validation_error_response(e)
     except Exception as e:
-        return ChatToolResponse(error=f"Failed to get recommendations: {str(e)}")
+        return tool_response(error=f"Failed to get recommendations: {str(e)}")
 
 
 # ============================================
 # Omi Chat Tools Manifest
 # ============================================
 
+# Request body fields every tool receives; never advertised as parameters
+_BASE_REQUEST_FIELDS: Final[Set[str]] = set(ChatToolRequest.model_fields)
+
+
+def _tool_parameters(model: Type[ChatToolRequest]) -> Dict[str, Any]:
+    """Build a manifest "parameters" block from a request model's JSON schema."""
+    schema = model.model_json_schema()
+    properties = {}
+    for name, prop in schema["properties"].items():
+        if name in _BASE_REQUEST_FIELDS or prop.get("manifest") is False:
+            continue
+        # Optional[X] comes out as anyOf [X, null]; advertise X
+        types = [option["type"] for option in prop.get("anyOf", [prop]) if option.get("type") != "null"]
+        properties[name] = {"type": types[0]}
+        if "description" in prop:
+            properties[name]["description"] = prop["description"]
+    required = [name for name in schema.get("required", []) if name in properties]
+    return {"properties": properties, "required": required}
+
+
+def _tool_entry(model: Type[ChatToolRequest], description: str, status_message: str) -> Dict[str, Any]:
+    """Build one manifest tool entry; the name comes from the model's tool_name."""
+    name = model.model_fields["tool_name"].default
+    return {
+        "name": name,
+        "description": description,
+        "endpoint": f"/tools/{name}",
+        "method": "POST",
+        "parameters": _tool_parameters(model),
+        "auth_required": True,
+        "status_message": status_message,
+    }
+
+
+# Manifest generated from the request models, serialised once at import
+_MANIFEST: Final[Dict[str, Any]] = {
+    "tools": [
+        _tool_entry(
+            SearchSongsRequest,
+            "Search for songs on Spotify. Use this when the user wants to find songs, look up music, or search for tracks by name, artist, or album.",
+            "Searching Spotify...",
+        ),
+        _tool_entry(
+            AddToPlaylistRequest,
+            "Add a song to a Spotify playlist. Use this when the user wants to add a song or track to one of their playlists.",
+            "Adding to playlist...",
+        ),
+        _tool_entry(
+            CreatePlaylistRequest,
+            "Create a new Spotify playlist. Use this when the user wants to create or make a new playlist.",
+            "Creating playlist...",
+        ),
+        _tool_entry(
+            GetPlaylistsRequest,
+            "Get the user's Spotify playlists. Use this when the user wants to see their playlists or check what playlists they have (can return playlist ids).",
+            "Getting your playlists...",
+        ),
+        _tool_entry(
+            GetNowPlayingRequest,
+            "Get the currently playing track on Spotify. Use this when the user asks what's playing or wants to know the current track.",
+            "Checking what's playing...",
+        ),
+        _tool_entry(
+            ControlPlaybackRequest,
+            "Control Spotify playback - play, pause, skip to next, or go to previous track. Use this when the user wants to control their music.",
+            "Controlling playback...",
+        ),
+        _tool_entry(
+            PlaySongRequest,
+            "Search for and play a specific song on Spotify. Use this when the user wants to play a particular song.",
+            "Playing song...",
+        ),
+        _tool_entry(
+            PlayPlaylistRequest,
+            "Play a specific playlist on Spotify. Use this when the user wants to play a particular playlist. You can provide either the playlist ID or the playlist name.",
+            "Playing playlist...",
+        ),
+        _tool_entry(
+            GetRecommendationsRequest,
+            "Get personalized song recommendations from Spotify. Use this when the user wants music suggestions or to discover new songs.",
+            "Getting recommendations...",
+        ),
+    ]
+}
+_MANIFEST_BYTES: Final[bytes] = orjson.dumps(_MANIFEST)
+_MANIFEST_ETAG: Final[str] = '"' + hashlib.sha1(_MANIFEST_BYTES).hexdigest() + '"'
+_MANIFEST_HEADERS: Final[Dict[str, str]] = {
+    "ETag": _MANIFEST_ETAG,
+    "Cache-Control": "public, max-age=3600",
+    "Vary": "Accept-Encoding",
+}
+
+# Gzipped once here; the middleware leaves already-encoded responses alone
+_MANIFEST_GZ: Final[bytes] = gzip.compress(_MANIFEST_BYTES, GZIP_COMPRESS_LEVEL)
+_MANIFEST_GZ_ETAG: Final[str] = '"' + hashlib.sha1(_MANIFEST_GZ).hexdigest() + '"'
+_MANIFEST_GZ_HEADERS: Final[Dict[str, str]] = {
+    **_MANIFEST_HEADERS,
+    "ETag": _MANIFEST_GZ_ETAG,
+    "Content-Encoding": "gzip",
+}
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Check an Accept-Encoding header for gzip the same way GZipMiddleware does
+    (a plain substring test), so the handler and middleware never disagree.
+    """
+    return "gzip" in (accept_encoding or "")
+
+
 @app.get("/.well-known/omi-tools.json")
-async def get_omi_tools_manifest():
+async def get_omi_tools_manifest(request: Request):
     """
     Omi Chat Tools Manifest endpoint.
     
     This endpoint returns the chat tools definitions that Omi will fetch
     when the app is created or updated in the Omi App Store.
+    The manifest only changes between deployments, so repeat fetches with
+    a matching If-None-Match get a 304. Clients accepting gzip get the
+    precompressed copy.
     """
-    return {
-        "tools": [
-            {
-                "name": "search_songs",
-                "description": "Search for songs on Spotify. Use this when the user wants to find songs, look up music, or search for tracks by name, artist, or album.",
-                "endpoint": "/tools/search_songs",
-                "method": "POST",
-                "parameters": {
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "Search query - song name, artist name, or album name"
-                        },
-                        "limit": {
-                            "type": "integer",
-                            "description": "Maximum number of results to return (default: 5)"
-                        }
-                    },
-                    "required": ["query"]
-                },
-                "auth_required": True,
-                "status_message": "Searching Spotify..."
-            },
-            {
-                "name": "add_to_playlist",
-                "description": "Add a song to a Spotify playlist. Use this when the user wants to add a song or track to one of their playlists.",
-                "endpoint": "/tools/add_to_playlist",
-                "method": "POST",
-                "parameters": {
-                    "properties": {
-                        "song_name": {
-                            "type": "string",
-                            "description": "Name of the song to add"
-                        },
-                        "artist_name": {
-                            "type": "string",
-                            "description": "Artist name (helps find the exact song)"
-                        },
-                        "playlist_name": {
-                            "type": "string",
-                            "description": "Name of the playlist to add to (uses default if not specified)"
-                        }
-                    },
-                    "required": ["song_name"]
-                },
-                "auth_required": True,
-                "status_message": "Adding to playlist..."
-            },
-            {
-                "name": "create_playlist",
-                "description": "Create a new Spotify playlist. Use this when the user wants to create or make a new playlist.",
-                "endpoint": "/tools/create_playlist",
-                "method": "POST",
-                "parameters": {
-                    "properties": {
-                        "name": {
-                            "type": "string",
-                            "description": "Name for the new playlist"
-                        },
-                        "description": {
-                            "type": "string",
-                            "description": "Description for the playlist"
-                        },
-                        "public": {
-                            "type": "boolean",
-                            "description": "Whether the playlist should be public (default: false)"
-                        }
-                    },
-                    "required": ["name"]
-                },
-                "auth_required": True,
-                "status_message": "Creating playlist..."
-            },
-            {
-                "name": "get_playlists",
-                "description": "Get the user's Spotify playlists. Use this when the user wants to see their playlists or check what playlists they have (can return playlist ids).",
-                "endpoint": "/tools/get_playlists",
-                "method": "POST",
-                "parameters": {
-                    "properties": {
-                        "limit": {
-                            "type": "integer",
-                            "description": "Maximum number of playlists to return (default: 10)"
-                        }
-                    },
-                    "required": []
-                },
-                "auth_required": True,
-                "status_message": "Getting your playlists..."
-            },
-            {
-                "name": "get_now_playing",
-                "description": "Get the currently playing track on Spotify. Use this when the user asks what's playing or wants to know the current track.",
-                "endpoint": "/tools/get_now_playing",
-                "method": "POST",
-                "parameters": {
-                    "properties": {},
-                    "required": []
-                },
-                "auth_required": True,
-                "status_message": "Checking what's playing..."
-            },
-            {
-                "name": "control_playback",
-                "description": "Control Spotify playback - play, pause, skip to next, or go to previous track. Use this when the user wants to control their music.",
-                "endpoint": "/tools/control_playback",
-                "method": "POST",
-                "parameters": {
-                    "properties": {
-                        "action": {
-                            "type": "string",
-                            "description": "Playback action: 'play', 'pause', 'next', 'skip', or 'previous'"
-                        }
-                    },
-                    "required": ["action"]
-                },
-                "auth_required": True,
-                "status_message": "Controlling playback..."
-            },
-            {
-                "name": "play_song",
-                "description": "Search for and play a specific song on Spotify. Use this when the user wants to play a particular song.",
-                "endpoint": "/tools/play_song",
-                "method": "POST",
-                "parameters": {
-                    "properties": {
-                        "song_name": {
-                            "type": "string",
-                            "description": "Name of the song to play"
-                        },
-                        "artist_name": {
-                            "type": "string",
-                            "description": "Artist name (helps find the exact song)"
-                        }
-                    },
-                    "required": ["song_name"]
-                },
-                "auth_required": True,
-                "status_message": "Playing song..."
-            },
-            {
-                "name": "play_playlist",
-                "description": "Play a specific playlist on Spotify. Use this when the user wants to play a particular playlist. You can provide either the playlist ID or the playlist name.",
-                "endpoint": "/tools/play_playlist",
-                "method": "POST",
-                "parameters": {
-                    "properties": {
-                        "playlist_id": {
-                            "type": "string",
-                            "description": "ID of the playlist to play"
-                        },
-                        "playlist_name": {
-                            "type": "string",
-                            "description": "Name of the playlist to play"
-                        }
-                    },
-                    "required": []
-                },
-                "auth_required": True,
-                "status_message": "Playing playlist..."
-            },
-            {
-                "name": "get_recommendations",
-                "description": "Get personalized song recommendations from Spotify. Use this when the user wants music suggestions or to discover new songs.",
-                "endpoint": "/tools/get_recommendations",
-                "method": "POST",
-                "parameters": {
-                    "properties": {
-                        "limit": {
-                            "type": "integer",
-                            "description": "Number of recommendations to return (default: 5)"
-                        }
-                    },
-                    "required": []
-                },
-                "auth_required": True,
-                "status_message": "Getting recommendations..."
-            }
-        ]
-    }
+    if _accepts_gzip(request.headers.get("accept-encoding")):
+        content, etag, headers = _MANIFEST_GZ, _MANIFEST_GZ_ETAG, _MANIFEST_GZ_HEADERS
+    else:
+        content, etag, headers = _MANIFEST_BYTES, _MANIFEST_ETAG, _MANIFEST_HEADERS
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
 
 
 # ============================================
 # Health Check
 # ============================================
 
+_HEALTH_BYTES: Final[bytes] = b'{"status":"healthy","service":"spotify-omi-integration"}'
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "spotify-omi-integration"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
+
+
+# Readiness probes hit Spotify, so results are cached and the check is kept short
+READINESS_CACHE_TTL = 10  # seconds
+READINESS_TIMEOUT = 0.5  # seconds
+_READY_BYTES: Final[bytes] = b'{"status":"ready"}'
+_NOT_READY_BYTES: Final[bytes] = b'{"status":"not ready"}'
+
+# (last readiness result, monotonic time it was checked)
+_readiness: Tuple[bool, float] = (False, float("-inf"))
+
+
+async def check_spotify_ready() -> bool:
+    """Check that Spotify's token endpoint is reachable and accepts our credentials."""
+    try:
+        response = await http_client.post(
+            SPOTIFY_TOKEN_URL,
+            headers=SPOTIFY_AUTH_HEADERS,
+            data={"grant_type": "client_credentials"},
+            timeout=READINESS_TIMEOUT,
+        )
+    except httpx.HTTPError:
+        return False
+    return response.status_code == 200
+
+
+@app.get("/readyz")
+async def readiness_check():
+    """
+    Readiness check endpoint.
+    Unlike /health (liveness), this verifies Spotify can be reached with our
+    client credentials; the result is cached for READINESS_CACHE_TTL.
+    """
+    global _readiness
+    ready, checked_at = _readiness
+    if time.monotonic() - checked_at >= READINESS_CACHE_TTL:
+        ready = await check_spotify_ready()
+        _readiness = (ready, time.monotonic())
+    
+    if ready:
+        return Response(content=_READY_BYTES, media_type="application/json")
+    return Response(content=_NOT_READY_BYTES, status_code=503, media_type="application/json")
 
 
 if __name__ == "__main__":
-    import uvicorn
     port = int(os.environ.get("PORT", 8080))
-    uvicorn.run(app, host="0.0.0.0", port=port)
-
+    # One process unless configured: without REDIS_URL every worker would share
+    # data/tokens.json. With Redis, 2 * CPU count + 1 is a good starting point.
+    workers = int(os.getenv("UVICORN_WORKERS") or 1)
+    
+    if os.getenv("ASGI_SERVER") == "hypercorn":
+        # Hypercorn on uvloop; also speaks HTTP/2 (h2c) to clients that ask for it
+        from hypercorn.config import Config
+        from hypercorn.run import run
+        
+        config = Config()
+        config.application_path = "main:app"
+        config.bind = [f"0.0.0.0:{port}"]
+        config.workers = workers
+        config.worker_class = "uvloop"
+        config.keep_alive_timeout = 5
+        config.graceful_timeout = 30
+        run(config)
+    else:
+        import uvicorn
+        # Multiple workers need the app as an import string
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=port,
+            workers=workers,
+            loop="uvloop",
+            http="httptools",
+            # Shed load with 503s instead of queueing slow Spotify-bound requests
+            limit_concurrency=int(os.getenv("UVICORN_LIMIT_CONCURRENCY") or 256),
+            # Recycle workers periodically to cap leaked memory/file descriptors
+            # (only with a supervisor to respawn them; a lone process would just exit)
+            limit_max_requests=10000 if workers > 1 else None,
+            timeout_keep_alive=5,
+            timeout_graceful_shutdown=30,
+        )
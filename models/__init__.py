@@ -0,0 +1,263 @@
+"""
+Pydantic models for the Spotify Omi plugin.
+
+Omi conversation/webhook models live in models.conversation and are not
+imported here, so the chat tool endpoints don't pay for building them.
+"""
+import sys
+from typing import List, Optional, Any, Dict, NamedTuple, Tuple, Union, Literal, Annotated
+import orjson
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, TypeAdapter, computed_field
+
+
+def _intern_strings(values: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Intern names so repeats across results share one string object."""
+    return tuple(sys.intern(value) for value in values)
+
+
+def spotify_url_from_uri(uri: str) -> Optional[str]:
+    """Derive the open.spotify.com URL from a Spotify URI (spotify:<type>:<id>)."""
+    _, kind, item_id = uri.split(":", 2)
+    if kind == "local":
+        # Local files have no web URL
+        return None
+    return f"https://open.spotify.com/{kind}/{item_id}"
+
+
+# Immutable tuple of names (artists, genres), interned on validation
+InternedNames = Annotated[Tuple[str, ...], AfterValidator(_intern_strings)]
+
+
+class SpotifyTrack(BaseModel):
+    """Spotify track information."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    id: str
+    name: str
+    artists: InternedNames
+    album: str
+    duration_ms: int
+    uri: str
+    preview_url: Optional[str] = None
+
+    @computed_field
+    @property
+    def external_url(self) -> Optional[str]:
+        """Spotify web URL, derived from the URI rather than stored."""
+        return spotify_url_from_uri(self.uri)
+
+
+class SpotifyPlaylist(BaseModel):
+    """Spotify playlist information."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    id: str
+    name: str
+    description: Optional[str] = ""
+    owner: str
+    tracks_total: int
+    public: bool
+    uri: str
+    canEdit: bool
+    external_url: Optional[str] = None
+
+
+class SpotifyArtist(BaseModel):
+    """Spotify artist information."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    id: str
+    name: str
+    genres: InternedNames = ()
+    popularity: int = 0
+    uri: str
+    external_url: Optional[str] = None
+
+
+class SpotifyAlbum(BaseModel):
+    """Spotify album information."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    id: str
+    name: str
+    artists: InternedNames
+    release_date: str
+    total_tracks: int
+    uri: str
+    external_url: Optional[str] = None
+
+
+class NowPlaying(BaseModel):
+    """Currently playing track information."""
+    model_config = ConfigDict(extra="ignore", frozen=True)
+
+    is_playing: bool
+    track: Optional[SpotifyTrack] = None
+    progress_ms: int = 0
+    device_name: Optional[str] = None
+
+
+# Lightweight records for parsing Spotify API responses internally;
+# the Pydantic models above are kept for API request/response bodies.
+class TrackInfo(NamedTuple):
+    """Track parsed from a Spotify API response."""
+    id: str
+    name: str
+    artists: Tuple[str, ...]
+    album: str
+    duration_ms: int
+    uri: str
+    preview_url: Optional[str] = None
+
+    @property
+    def external_url(self) -> Optional[str]:
+        """Spotify web URL, derived from the URI rather than stored."""
+        return spotify_url_from_uri(self.uri)
+
+
+class PlaylistInfo(NamedTuple):
+    """Playlist parsed from a Spotify API response."""
+    id: str
+    name: str
+    uri: str
+    description: Optional[str] = ""
+    owner: str = ""
+    tracks_total: int = 0
+    public: bool = False
+    canEdit: bool = False
+    external_url: Optional[str] = None
+
+
+# Omi Chat Tool Models
+# Each tool request's own fields (not the ChatToolRequest base fields) are
+# advertised in the tools manifest unless marked json_schema_extra=NOT_IN_MANIFEST.
+NOT_IN_MANIFEST = {"manifest": False}
+
+
+class ChatToolRequest(BaseModel):
+    """Base request model for Omi chat tools."""
+    model_config = ConfigDict(extra="ignore")
+
+    uid: str
+    app_id: Optional[str] = None
+    tool_name: Optional[str] = None
+
+
+class SearchSongsRequest(ChatToolRequest):
+    """Request model for searching songs."""
+    tool_name: Literal["search_songs"] = "search_songs"
+    query: str = Field(description="Search query - song name, artist name, or album name")
+    limit: int = Field(5, description="Maximum number of results to return (default: 5)")
+
+
+class AddToPlaylistRequest(ChatToolRequest):
+    """Request model for adding song to playlist."""
+    tool_name: Literal["add_to_playlist"] = "add_to_playlist"
+    song_name: str = Field(description="Name of the song to add")
+    artist_name: Optional[str] = Field(None, description="Artist name (helps find the exact song)")
+    playlist_name: Optional[str] = Field(None, description="Name of the playlist to add to (uses default if not specified)")
+    playlist_id: Optional[str] = Field(None, json_schema_extra=NOT_IN_MANIFEST)
+
+
+class CreatePlaylistRequest(ChatToolRequest):
+    """Request model for creating a playlist."""
+    tool_name: Literal["create_playlist"] = "create_playlist"
+    name: str = Field(description="Name for the new playlist")
+    description: Optional[str] = Field("Created with Omi", description="Description for the playlist")
+    public: bool = Field(False, description="Whether the playlist should be public (default: false)")
+
+
+class GetPlaylistsRequest(ChatToolRequest):
+    """Request model for getting user playlists."""
+    tool_name: Literal["get_playlists"] = "get_playlists"
+    limit: int = Field(10, description="Maximum number of playlists to return (default: 10)")
+
+
+class PlaySongRequest(ChatToolRequest):
+    """Request model for playing a song."""
+    tool_name: Literal["play_song"] = "play_song"
+    song_name: str = Field(description="Name of the song to play")
+    artist_name: Optional[str] = Field(None, description="Artist name (helps find the exact song)")
+
+
+class ControlPlaybackRequest(ChatToolRequest):
+    """Request model for playback control."""
+    tool_name: Literal["control_playback"] = "control_playback"
+    action: str = Field(description="Playback action: 'play', 'pause', 'next', 'skip', or 'previous'")
+
+
+class GetNowPlayingRequest(ChatToolRequest):
+    """Request model for getting currently playing track."""
+    tool_name: Literal["get_now_playing"] = "get_now_playing"
+
+
+class PlayPlaylistRequest(ChatToolRequest):
+    """Request model for playing a playlist."""
+    tool_name: Literal["play_playlist"] = "play_playlist"
+    playlist_id: Optional[str] = Field(None, description="ID of the playlist to play")
+    playlist_name: Optional[str] = Field(None, description="Name of the playlist to play")
+
+
+class GetRecommendationsRequest(ChatToolRequest):
+    """Request model for getting recommendations."""
+    tool_name: Literal["get_recommendations"] = "get_recommendations"
+    seed_tracks: Optional[List[str]] = Field(None, json_schema_extra=NOT_IN_MANIFEST)
+    seed_artists: Optional[List[str]] = Field(None, json_schema_extra=NOT_IN_MANIFEST)
+    seed_genres: Optional[List[str]] = Field(None, json_schema_extra=NOT_IN_MANIFEST)
+    limit: int = Field(5, description="Number of recommendations to return (default: 5)")
+
+
+# Every chat tool request, told apart by tool_name; one validator serves them all
+TOOL_REQUEST_MODELS = (
+    SearchSongsRequest,
+    AddToPlaylistRequest,
+    CreatePlaylistRequest,
+    GetPlaylistsRequest,
+    GetNowPlayingRequest,
+    ControlPlaybackRequest,
+    PlaySongRequest,
+    PlayPlaylistRequest,
+    GetRecommendationsRequest,
+)
+AnyToolRequest = Annotated[Union[TOOL_REQUEST_MODELS], Field(discriminator="tool_name")]
+TOOL_REQUEST_ADAPTER = TypeAdapter(AnyToolRequest)
+
+# The union's tags, which also prefix the location of its validation errors
+TOOL_NAMES = frozenset(model.model_fields["tool_name"].default for model in TOOL_REQUEST_MODELS)
+
+
+def validate_tool_request(tool_name: str, data: Any) -> ChatToolRequest:
+    """Validate a request body for the chat tool served at `tool_name`."""
+    if isinstance(data, dict):
+        # LLM callers often send null for arguments they skip; treat those as
+        # absent so defaults apply (and a null uid reads as missing).
+        # The route decides the tool, whatever tool_name the body carries.
+        data = {key: value for key, value in data.items() if value is not None}
+        data["tool_name"] = tool_name
+    return TOOL_REQUEST_ADAPTER.validate_python(data)
+
+
+class ChatToolResponse(BaseModel):
+    """Response model for Omi chat tools."""
+    result: Optional[str] = None
+    error: Optional[str] = None
+
+
+def _error_payload(message: str) -> bytes:
+    """Serialise a fixed ChatToolResponse error once."""
+    return orjson.dumps({"result": None, "error": message})
+
+
+# Pre-serialised ChatToolResponse bodies for the fixed tool errors
+ERR_UID_REQUIRED = _error_payload("User ID is required")
+ERR_NOT_CONNECTED = _error_payload("Please connect your Spotify account first in the app settings.")
+ERR_QUERY_REQUIRED = _error_payload("Search query is required")
+ERR_SONG_NAME_REQUIRED = _error_payload("Song name is required")
+ERR_PLAYLIST_NAME_REQUIRED = _error_payload("Playlist name is required")
+ERR_PLAYLIST_REQUIRED = _error_payload("Playlist ID or name is required")
+ERR_NO_DEFAULT_PLAYLIST = _error_payload(
+    "No playlist specified and no default playlist set. Please specify a playlist name or set a default in app settings."
+)
+ERR_PROFILE_FAILED = _error_payload("Failed to get user profile")
+ERR_INVALID_ACTION = _error_payload("Invalid action. Use: play, pause, next, previous")
+ERR_NO_ACTIVE_DEVICE = _error_payload("No active Spotify device found. Please open Spotify on one of your devices first.")
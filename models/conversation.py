@@ -0,0 +1,41 @@
+"""
+Omi conversation models (for future memory/webhook integrations).
+
+Import this module inside the handler that needs it rather than at the
+top of main.py.
+"""
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+
+class TranscriptSegment(BaseModel):
+    """Transcript segment from Omi conversation."""
+    text: str
+    speaker: Optional[str] = "SPEAKER_00"
+    is_user: bool
+    start: float
+    end: float
+
+
+class Structured(BaseModel):
+    """Structured conversation data."""
+    title: str
+    overview: str
+    emoji: str = ""
+    category: str = "other"
+
+
+class Conversation(BaseModel):
+    """Omi conversation model."""
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    transcript_segments: List[TranscriptSegment] = []
+    structured: Structured
+    discarded: bool
+
+
+class EndpointResponse(BaseModel):
+    """Standard endpoint response for Omi webhooks."""
+    message: str = Field(description="A short message to be sent as notification to the user, if needed.", default="")